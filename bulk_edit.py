@@ -0,0 +1,79 @@
+"""Apply the save editor's recipes to many CompleteSave files at once.
+
+Usage:
+    python bulk_edit.py edits.json CompleteSave [CompleteSave ...] [--out-dir DIR] [--recipes recipes.json]
+
+edits.json is a list of edits, the same ones the Save button builds, e.g.:
+    [{"recipe": "set_money", "params": {"value": 5000000}},
+     {"recipe": "unlock_trucks"},
+     {"recipe": "remove_rusty_trucks"}]
+"""
+import argparse
+import json
+import os
+import sys
+from utility import decode_file, build_encoded_file, dump_save_json
+from recipes import DEFAULT_RECIPES_PATH, load_recipes, compile_edits, apply_plan
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply save editor recipes to CompleteSave files.")
+    parser.add_argument("edits", help="JSON file with the list of edits to apply.")
+    parser.add_argument("saves", nargs="+", help="CompleteSave files to edit.")
+    parser.add_argument("--out-dir", default=None, help="Directory for edited saves. Each save is written to DIR/<n>/. Defaults to writing '<save>.edited' next to each save.")
+    parser.add_argument("--recipes", default=DEFAULT_RECIPES_PATH, help="Recipe file to use.")
+    args = parser.parse_args(argv)
+
+    try:
+        with open(args.edits, 'r', encoding='utf-8') as f:
+            edits = json.load(f)
+        # Compiled once, then reused for every save
+        plan = compile_edits(edits, load_recipes(args.recipes))
+    except OSError as e:
+        parser.error(f"could not read file: {e}")
+    except ValueError as e: # Invalid JSON, unknown recipe/op/constant, missing or unknown parameter
+        parser.error(str(e))
+    except (KeyError, TypeError, AttributeError) as e: # Edits or recipes that are not shaped like the examples
+        parser.error(f"malformed edits or recipes file ({e!r})")
+
+    failures = 0
+    for save_number, save_path in enumerate(args.saves, start=1):
+        try:
+            with open(save_path, 'rb') as f:
+                file_content_bytes = f.read()
+        except OSError as e:
+            print(f"Skipping '{save_path}': could not read file ({e}).", file=sys.stderr)
+            failures += 1
+            continue
+
+        try:
+            original_file_content_bytes, decompressed_data = decode_file(file_content_bytes, raise_errors=True)
+        except Exception as e:
+            print(f"Skipping '{save_path}': failed to decode ({e}).", file=sys.stderr)
+            failures += 1
+            continue
+
+        try:
+            json_data = json.loads(decompressed_data.decode('utf-8'))
+        except ValueError as e: # UnicodeDecodeError and JSONDecodeError
+            print(f"Skipping '{save_path}': invalid JSON ({e}).", file=sys.stderr)
+            failures += 1
+            continue
+
+        apply_plan(json_data, plan)
+        final_data, new_md5 = build_encoded_file(original_file_content_bytes, dump_save_json(json_data))
+
+        if args.out_dir:
+            # Saves are all called 'CompleteSave', so each one gets its own numbered folder
+            save_out_dir = os.path.join(args.out_dir, str(save_number))
+            os.makedirs(save_out_dir, exist_ok=True)
+            out_path = os.path.join(save_out_dir, os.path.basename(save_path))
+        else:
+            out_path = save_path + ".edited"
+        with open(out_path, 'wb') as f:
+            f.write(final_data)
+        print(f"Wrote '{out_path}' (MD5 {new_md5}).")
+
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,6 +2,7 @@ import json
 import streamlit as st
 from valid_values import ALL_LEVELS_LIST, ALL_TRUCKS_LIST
 from utility import decode_file
+from history import EditHistory
 
 def load_and_init_session_state(file_content):
     original_file_content_bytes, decompressed_data = decode_file(file_content)
@@ -11,6 +12,7 @@ def load_and_init_session_state(file_content):
             json_data = json.loads(decompressed_data.decode('utf-8'))
             st.session_state.json_data = json_data
             st.session_state.original_file_content_bytes = original_file_content_bytes
+            st.session_state.edit_history = EditHistory() # Undo history belongs to the loaded file
             
             # Initialize initial_values for the session
             st.session_state.initial_values = {
@@ -0,0 +1,218 @@
+import copy
+import json
+import sys
+import zlib
+from collections import deque
+
+# --- Constants ---
+DEFAULT_MAX_HISTORY_BYTES = 16 * 1024**2 # 16 MB of Python objects held by stored deltas, per session
+DEFAULT_MAX_HISTORY_STEPS = 100
+
+class _Missing:
+    """Marks a key that did not exist on one side of a change."""
+    def __repr__(self):
+        return "MISSING"
+
+MISSING = _Missing()
+
+class KeyOrder(tuple):
+    """The key order of one dict, stored in a delta in place of a value when only the order needs restoring."""
+
+# --- Size Estimates ---
+def deep_sizeof(obj):
+    """Estimate the memory held by a parsed JSON value (or a delta), counting each object once."""
+    seen = set()
+    size = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        size += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple)):
+            stack.extend(item)
+    return size
+
+# --- Delta Functions ---
+def compute_delta(old, new, path=()):
+    """Return the path-level changes between two parsed JSON documents as a list of (path, old_value, new_value).
+
+    Dicts and equal-length lists are compared item by item, so only the changed
+    leaves (or subtrees whose type/length changed) are stored, not whole documents.
+    When a dict's key order would not survive the changes, a (path, KeyOrder, KeyOrder)
+    entry follows them so apply and undo can restore the order of just that dict.
+    """
+    if old is new:
+        return []
+    if isinstance(old, dict) and isinstance(new, dict):
+        changes = []
+        for key, old_value in old.items():
+            if key not in new:
+                changes.append((path + (key,), old_value, MISSING))
+            else:
+                changes.extend(compute_delta(old_value, new[key], path + (key,)))
+        for key, new_value in new.items():
+            if key not in old:
+                changes.append((path + (key,), MISSING, new_value))
+        # Keys added by apply (or re-added by undo) go to the end of the dict
+        if ([key for key in old if key in new] + [key for key in new if key not in old] != list(new)
+                or [key for key in new if key in old] + [key for key in old if key not in new] != list(old)):
+            changes.append((path, KeyOrder(old), KeyOrder(new)))
+        return changes
+    if isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        changes = []
+        for idx, (old_value, new_value) in enumerate(zip(old, new)):
+            changes.extend(compute_delta(old_value, new_value, path + (idx,)))
+        return changes
+    # Compare types too, so 1 -> 1.0 or 1 -> True still counts as an edit
+    if type(old) is type(new) and old == new:
+        return []
+    return [(path, old, new)]
+
+def _set_path(doc, path, value):
+    """Set (or delete, for MISSING) the value at path inside doc. Returns the document, which only changes for the root path."""
+    if isinstance(value, KeyOrder):
+        # Reorder the dict at path in place; its values are moved, not copied
+        target = doc
+        for key in path:
+            target = target[key]
+        items = [(key, target[key]) for key in value]
+        target.clear()
+        target.update(items)
+        return doc
+    if isinstance(value, (dict, list)):
+        # Insert a copy so the stored delta is never mutated by later edits to doc
+        value = copy.deepcopy(value)
+    if not path:
+        return value
+    parent = doc
+    for key in path[:-1]:
+        parent = parent[key]
+    if value is MISSING:
+        del parent[path[-1]]
+    else:
+        parent[path[-1]] = value
+    return doc
+
+def apply_delta(doc, delta, reverse=False):
+    """Apply a delta to doc in place (or undo it with reverse=True) and return the resulting document."""
+    if reverse:
+        # Applied in forward order too: a dict's KeyOrder entry must come after the key changes it reorders
+        for path, old_value, _new_value in delta:
+            doc = _set_path(doc, path, old_value)
+    else:
+        for path, _old_value, new_value in delta:
+            doc = _set_path(doc, path, new_value)
+    return doc
+
+def estimate_delta_size(delta):
+    """Estimate how many bytes of Python objects a delta keeps alive."""
+    size = sys.getsizeof(delta)
+    for entry in delta:
+        size += sys.getsizeof(entry) + sys.getsizeof(entry[0])
+        for value in entry[1:]:
+            if isinstance(value, KeyOrder):
+                size += sys.getsizeof(value) # Its key strings are shared with the document
+            elif value is not MISSING:
+                size += deep_sizeof(value)
+    return size
+
+def pack_delta(delta):
+    """Serialize and compress a delta, for keeping it without holding its values as Python objects."""
+    def encode(value):
+        if value is MISSING:
+            return {"missing": True}
+        if isinstance(value, KeyOrder):
+            return {"key_order": list(value)}
+        return {"value": value}
+    entries = [[list(path), encode(old_value), encode(new_value)] for path, old_value, new_value in delta]
+    return zlib.compress(json.dumps(entries, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+def unpack_delta(packed_delta):
+    """Inverse of pack_delta."""
+    def decode(encoded):
+        if "missing" in encoded:
+            return MISSING
+        if "key_order" in encoded:
+            return KeyOrder(encoded["key_order"])
+        return encoded["value"]
+    entries = json.loads(zlib.decompress(packed_delta).decode('utf-8'))
+    return [(tuple(path), decode(old_value), decode(new_value)) for path, old_value, new_value in entries]
+
+# --- Edit History ---
+class EditHistory:
+    """Undo/redo stack for a session's parsed save, storing each step as a path-level delta.
+
+    Undo and redo only touch the paths a step changed, so their cost depends on the
+    size of the edit rather than the size of the save. When the stored deltas exceed
+    max_bytes (or max_steps), the oldest steps are dropped; a single step larger than
+    max_bytes is not kept at all, and last_commit_undoable is False.
+    """
+    def __init__(self, max_bytes=DEFAULT_MAX_HISTORY_BYTES, max_steps=DEFAULT_MAX_HISTORY_STEPS):
+        self.max_bytes = max_bytes
+        self.max_steps = max_steps
+        self._undo_steps = deque() # (label, delta, size)
+        self._redo_steps = []
+        self.total_bytes = 0
+        self.version = 0 # Bumped whenever the document is changed through this history
+        self.last_commit_undoable = True
+
+    def can_undo(self):
+        return bool(self._undo_steps)
+
+    def can_redo(self):
+        return bool(self._redo_steps)
+
+    def commit(self, doc, new_doc, label="Edit"):
+        """Move doc to new_doc, recording the change as one undoable step. Returns the resulting document."""
+        delta = compute_delta(doc, new_doc)
+        if not delta:
+            self.last_commit_undoable = True
+            return doc
+        doc = apply_delta(doc, delta)
+        self.version += 1
+
+        size = estimate_delta_size(delta)
+        self._undo_steps.append((label, delta, size))
+        self.total_bytes += size
+        # A new edit invalidates everything that could have been redone
+        for _label, _delta, redo_size in self._redo_steps:
+            self.total_bytes -= redo_size
+        self._redo_steps.clear()
+        self._enforce_limits()
+        self.last_commit_undoable = bool(self._undo_steps) and self._undo_steps[-1][1] is delta
+        return doc
+
+    def undo(self, doc):
+        """Revert the most recent step and return the resulting document."""
+        if not self._undo_steps:
+            return doc
+        step = self._undo_steps.pop()
+        self._redo_steps.append(step)
+        self.version += 1
+        return apply_delta(doc, step[1], reverse=True)
+
+    def redo(self, doc):
+        """Re-apply the most recently undone step and return the resulting document."""
+        if not self._redo_steps:
+            return doc
+        step = self._redo_steps.pop()
+        self._undo_steps.append(step)
+        self.version += 1
+        return apply_delta(doc, step[1])
+
+    def undo_label(self):
+        return self._undo_steps[-1][0] if self._undo_steps else None
+
+    def redo_label(self):
+        return self._redo_steps[-1][0] if self._redo_steps else None
+
+    def _enforce_limits(self):
+        # Drop the oldest steps first, down to none if the latest step alone is over budget
+        while self._undo_steps and (self.total_bytes > self.max_bytes or len(self._undo_steps) > self.max_steps):
+            _label, _delta, size = self._undo_steps.popleft()
+            self.total_bytes -= size
@@ -0,0 +1,64 @@
+import time
+import streamlit as st
+from session_memory import get_session_registry, format_bytes, LOW_MEMORY_MODE, IDLE_EVICT_SECONDS, OPERATOR_PAGE_ENABLED
+
+# Operator page: not linked in the sidebar, open it directly at /memory_usage (requires ROADCRAFT_OPERATOR_PAGE=1)
+st.set_page_config(layout="wide", page_title="Roadcraft Session Memory", initial_sidebar_state="collapsed")
+
+# Lists every session and can force them to re-parse, so it is off unless the operator enables it
+if not OPERATOR_PAGE_ENABLED:
+    st.error("This page is disabled. Set ROADCRAFT_OPERATOR_PAGE=1 on the server to enable it.")
+    st.stop()
+
+st.markdown("### Session Memory")
+st.markdown(
+    f"Low-memory mode: **{'on' if LOW_MEMORY_MODE else 'off'}** (`ROADCRAFT_LOW_MEMORY`) · "
+    f"Idle eviction: **{f'after {IDLE_EVICT_SECONDS} s' if IDLE_EVICT_SECONDS > 0 else 'off'}** (`ROADCRAFT_IDLE_EVICT_SECONDS`)"
+)
+
+st.caption("Sizes are Python memory held per session (sys.getsizeof, counted recursively for parsed JSON and undo history).")
+
+now = time.time()
+rows = []
+for slot in get_session_registry().slots():
+    if slot.checked_out:
+        state = "running"
+    elif slot.compact:
+        state = "compact"
+    elif slot.json_data is not None:
+        state = "parsed"
+    else:
+        state = "empty"
+    stats = dict(slot.stats) # Copy, the session may update it while we read
+    # The raw text area is only held while a run is in progress, so it is not part of the held total
+    held_bytes = sum(size for name, size in stats.items() if name != 'raw_text_area')
+    rows.append({
+        "Session": slot.session_id,
+        "State": state,
+        "Idle (s)": int(now - slot.last_active),
+        "Original file": format_bytes(stats.get('original_file_content_bytes', 0)),
+        "Parsed JSON": format_bytes(stats.get('json_data', 0)),
+        "Pending delta": format_bytes(stats.get('pending_delta', 0)),
+        "Initial values": format_bytes(stats.get('initial_values', 0)),
+        "Undo history": format_bytes(stats.get('edit_history', 0)),
+        "Raw text area (last run)": format_bytes(stats.get('raw_text_area', 0)),
+        "Total held": format_bytes(held_bytes),
+        "_total": held_bytes,
+    })
+
+rows.sort(key=lambda row: row["_total"], reverse=True)
+col1, col2 = st.columns(2)
+col1.metric("Sessions", len(rows))
+col2.metric("Estimated total", format_bytes(sum(row["_total"] for row in rows)))
+
+if rows:
+    st.dataframe([{k: v for k, v in row.items() if k != "_total"} for row in rows], hide_index=True, use_container_width=True)
+else:
+    st.info("No editor sessions yet.")
+
+refresh_col, evict_col = st.columns(2)
+if refresh_col.button("Refresh"):
+    st.rerun()
+if evict_col.button("Compact all idle sessions now", help="Compacts every session that is not currently running, regardless of the idle timeout."):
+    get_session_registry().evict_idle(0)
+    st.rerun()
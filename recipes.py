@@ -0,0 +1,159 @@
+import json
+import os
+from functools import lru_cache
+from valid_values import ALL_LEVELS_LIST, ALL_TRUCKS_LIST
+
+# --- Constants ---
+DEFAULT_RECIPES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "recipes.json")
+
+# Names usable as "$NAME" anywhere in a recipe, alongside the recipe's own params
+RECIPE_CONSTANTS = {
+    "ALL_LEVELS": ALL_LEVELS_LIST,
+    "ALL_TRUCKS": ALL_TRUCKS_LIST,
+}
+
+# --- Recipe Operations ---
+# Each builder takes the resolved op spec and returns a function that mutates
+# SslValue in place. All lookups/conversions happen here, once per compile,
+# so applying the compiled plan to a save only does the mutation itself.
+
+def _build_set(spec):
+    key, value = spec['key'], spec['value']
+    def apply(ssl_value):
+        # Copy lists so saves never share the recipe's (or valid_values') list objects
+        ssl_value[key] = list(value) if isinstance(value, list) else value
+    return apply
+
+def _build_set_each_level(spec):
+    key, levels, value = spec['key'], tuple(spec['levels']), spec['value']
+    def apply(ssl_value):
+        per_level = ssl_value.setdefault(key, {})
+        for map_name in levels:
+            per_level[map_name] = value
+    return apply
+
+def _build_set_complement(spec):
+    key, selected = spec['key'], set(spec['value'])
+    complement = [item for item in spec['of'] if item not in selected]
+    def apply(ssl_value):
+        ssl_value[key] = list(complement)
+    return apply
+
+def _build_clear_matching(spec):
+    key, suffix, keep = spec['key'], spec['suffix'], frozenset(spec.get('except', ()))
+    def apply(ssl_value):
+        entries = ssl_value.get(key)
+        if not entries:
+            return
+        for name in entries: # Only values are replaced, so iterating the dict directly is safe
+            if name.endswith(suffix) and name not in keep:
+                entries[name] = []
+    return apply
+
+def _build_set_level_resources(spec):
+    key, levels = spec['key'], tuple(spec['levels'])
+    updates = tuple((int(idx), value) for idx, value in spec.get('values', {}).items())
+    def apply(ssl_value):
+        per_level = ssl_value.setdefault(key, {})
+        for map_name in levels:
+            if map_name not in per_level:
+                per_level[map_name] = {"resources": [0]*8} # Initialize with 8 zeros if not present
+            resources = per_level[map_name].setdefault('resources', [])
+            for idx, value in updates:
+                # Ensure list is long enough, extend with zeros if needed
+                while len(resources) <= idx:
+                    resources.append(0)
+                resources[idx] = value
+    return apply
+
+OP_BUILDERS = {
+    "set": _build_set,
+    "set_each_level": _build_set_each_level,
+    "set_complement": _build_set_complement,
+    "clear_matching": _build_clear_matching,
+    "set_level_resources": _build_set_level_resources,
+}
+
+# --- Loading and Compiling ---
+@lru_cache(maxsize=None)
+def load_recipes(path=DEFAULT_RECIPES_PATH):
+    """Load and validate a recipe file. Cached, so each file is only read once per process."""
+    with open(path, 'r', encoding='utf-8') as f:
+        recipes = json.load(f)
+
+    for name, recipe in recipes.items():
+        for op_spec in recipe.get('ops', []):
+            if op_spec.get('op') not in OP_BUILDERS:
+                raise ValueError(f"Recipe '{name}' uses unknown op '{op_spec.get('op')}'.")
+            if 'key' not in op_spec:
+                raise ValueError(f"Recipe '{name}' has an op without a 'key'.")
+    return recipes
+
+def _resolve(template, bindings):
+    """Replace every "$name" string in template with its bound value."""
+    if isinstance(template, str) and template.startswith('$'):
+        name = template[1:]
+        if name not in bindings:
+            raise ValueError(f"Unknown recipe parameter '{template}'.")
+        return bindings[name]
+    if isinstance(template, list):
+        return [_resolve(item, bindings) for item in template]
+    if isinstance(template, dict):
+        return {k: _resolve(v, bindings) for k, v in template.items()}
+    return template
+
+def _resolve_given_param(value):
+    """Caller-supplied values are used as-is, except the explicit {"const": <NAME>} form for RECIPE_CONSTANTS."""
+    if isinstance(value, dict) and list(value) == ['const']:
+        if value['const'] not in RECIPE_CONSTANTS:
+            raise ValueError(f"Unknown recipe constant '{value['const']}'.")
+        return RECIPE_CONSTANTS[value['const']]
+    return value
+
+def compile_edits(edits, recipes=None):
+    """Compile a list of edits into a single plan that can be applied to any number of saves.
+
+    Each edit is {"recipe": <name>, "params": {...}}. Parameter values are never
+    reinterpreted, so user-typed text like "$ALL_TRUCKS" stays a string; use
+    {"const": "ALL_TRUCKS"} to pass a constant explicitly. Operations are grouped by the
+    SslValue key they touch, so applying the plan visits each key once, in edit order.
+    """
+    if recipes is None:
+        recipes = load_recipes()
+
+    plan = {}
+    for edit in edits:
+        name = edit['recipe']
+        if name not in recipes:
+            raise ValueError(f"Unknown recipe '{name}'.")
+        recipe = recipes[name]
+
+        bindings = dict(RECIPE_CONSTANTS)
+        given_params = edit.get('params', {})
+        for param, default in recipe.get('params', {}).items():
+            if param in given_params:
+                bindings[param] = _resolve_given_param(given_params[param])
+            elif default is not None:
+                bindings[param] = _resolve(default, RECIPE_CONSTANTS)
+            else:
+                raise ValueError(f"Recipe '{name}' requires parameter '{param}'.")
+        unknown_params = set(given_params) - set(recipe.get('params', {}))
+        if unknown_params:
+            raise ValueError(f"Recipe '{name}' got unknown parameters: {', '.join(sorted(unknown_params))}.")
+
+        for op_spec in recipe.get('ops', []):
+            resolved = _resolve(op_spec, bindings)
+            plan.setdefault(resolved['key'], []).append(OP_BUILDERS[resolved['op']](resolved))
+
+    return tuple((key, tuple(ops)) for key, ops in plan.items())
+
+def apply_plan(json_data, plan):
+    """Apply a compiled plan to a parsed save in place and return it."""
+    ssl_value = json_data.get('SslValue')
+    if not ssl_value:
+        json_data['SslValue'] = ssl_value = {}
+
+    for _key, ops in plan:
+        for op in ops:
+            op(ssl_value)
+    return json_data
@@ -0,0 +1,212 @@
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+import weakref
+import streamlit as st
+from history import compute_delta, apply_delta, deep_sizeof, pack_delta, unpack_delta
+from utility import index_blocks, decompress_indexed
+
+# --- Constants ---
+# Operators can set these in the environment of the hosted instance
+LOW_MEMORY_MODE = os.environ.get("ROADCRAFT_LOW_MEMORY", "0").lower() in ("1", "true", "yes")
+IDLE_EVICT_SECONDS = int(os.environ.get("ROADCRAFT_IDLE_EVICT_SECONDS", "900")) # 0 disables idle eviction
+OPERATOR_PAGE_ENABLED = os.environ.get("ROADCRAFT_OPERATOR_PAGE", "0").lower() in ("1", "true", "yes") # Shows pages/memory_usage.py
+SWEEP_INTERVAL_SECONDS = 30
+RAW_TEXT_AREA_KEY = "editable_json_text_area" # Widget key of the editor's raw JSON text area
+
+# --- Size Estimates ---
+def format_bytes(size):
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+# --- Session Slot ---
+class SessionSlot:
+    """Holds one browser session's parsed save between script runs.
+
+    While a script run is in progress the save is "checked out" into
+    st.session_state.json_data as usual. Between runs it lives here, either parsed
+    or compact: only the compressed original, its block index and the compressed
+    delta from the original to the current edits. Compact slots are re-parsed on the next run.
+    """
+    def __init__(self):
+        self.session_id = uuid.uuid4().hex[:8]
+        self.lock = threading.Lock()
+        self.checked_out = False
+        self.last_active = time.time()
+
+        self.json_data = None
+        self.original_file_content_bytes = None
+        self.block_index = ()
+        self.history = None
+        self.compact = False
+        # Packed changes from the original file to json_data, valid while history.version == delta_version
+        self.packed_delta = None
+        self.delta_version = None
+        self._uncompactable_version = None
+
+        self.stats = {}
+        self._json_size_key = None
+        self._json_size = 0
+
+    def has_save(self):
+        return self.json_data is not None or self.compact
+
+    def store(self, json_data, original_file_content_bytes, history):
+        """Keep the run's parsed save, tracking which file and history it belongs to. Caller holds the lock."""
+        if json_data is None or original_file_content_bytes is None:
+            self.clear()
+            return
+        if original_file_content_bytes is not self.original_file_content_bytes or history is not self.history:
+            # A new file was loaded: the parsed data matches the original exactly
+            self.original_file_content_bytes = original_file_content_bytes
+            self.block_index = index_blocks(original_file_content_bytes)
+            self.history = history
+            self.packed_delta = pack_delta([])
+            self.delta_version = history.version
+            self._uncompactable_version = None
+        self.json_data = json_data
+        self.compact = False
+
+    def take(self):
+        """Return the parsed save, re-deriving it from the compact form if needed. Caller holds the lock."""
+        if self.compact:
+            json_data = json.loads(decompress_indexed(self.original_file_content_bytes, self.block_index).decode('utf-8'))
+            self.json_data = apply_delta(json_data, unpack_delta(self.packed_delta))
+            self.compact = False
+        return self.json_data
+
+    def compact_now(self):
+        """Drop the parsed save, keeping only what is needed to re-derive it. Caller holds the lock.
+
+        Does nothing if the packed delta would not be smaller than the parsed save itself.
+        """
+        if self.compact or self.json_data is None or self.history.version == self._uncompactable_version:
+            return
+        if self.history.version != self.delta_version:
+            original_json_data = json.loads(decompress_indexed(self.original_file_content_bytes, self.block_index).decode('utf-8'))
+            self.packed_delta = pack_delta(compute_delta(original_json_data, self.json_data))
+            self.delta_version = self.history.version
+        if sys.getsizeof(self.packed_delta) >= self._parsed_size():
+            # Not worth it; don't hold the packed delta as well, and don't retry until the next edit
+            self._uncompactable_version = self.history.version
+            self.packed_delta = None
+            self.delta_version = None
+            return
+        self.json_data = None
+        self.compact = True
+        self.stats['json_data'] = 0
+        self.stats['pending_delta'] = sys.getsizeof(self.packed_delta)
+
+    def clear(self):
+        self.json_data = None
+        self.original_file_content_bytes = None
+        self.block_index = ()
+        self.history = None
+        self.compact = False
+        self.packed_delta = None
+        self.delta_version = None
+        self._uncompactable_version = None
+
+    def _parsed_size(self):
+        """Memory held by the parsed save. Only re-measured when it has actually changed: keyed on the
+        file and history version, not the object, since re-deriving a compact slot builds a new one."""
+        size_key = (id(self.original_file_content_bytes), id(self.history), self.history.version if self.history else 0)
+        if size_key != self._json_size_key:
+            self._json_size = deep_sizeof(self.json_data)
+            self._json_size_key = size_key
+        return self._json_size
+
+    def update_stats(self, session_state):
+        """Record this session's memory use for the operator page. Caller holds the lock.
+
+        Every figure is Python memory held (sys.getsizeof, recursively for containers), so they add up.
+        """
+        raw_text = session_state.get(RAW_TEXT_AREA_KEY)
+        self.stats = {
+            'original_file_content_bytes': sys.getsizeof(self.original_file_content_bytes) if self.original_file_content_bytes else 0,
+            'json_data': self._parsed_size() if self.json_data is not None else 0,
+            'pending_delta': sys.getsizeof(self.packed_delta) if self.compact else 0,
+            'initial_values': deep_sizeof(session_state.get('initial_values', {})),
+            'edit_history': self.history.total_bytes if self.history else 0,
+            'raw_text_area': sys.getsizeof(raw_text) if raw_text else 0, # During the last run only, dropped at check-in
+        }
+
+# --- Registry ---
+class SessionRegistry:
+    """Process-wide view of every session's slot, used for accounting and idle eviction."""
+    def __init__(self):
+        self._slots = weakref.WeakValueDictionary() # Slots disappear with their session's state
+        self._lock = threading.Lock()
+
+    def register(self, slot):
+        with self._lock:
+            self._slots[slot.session_id] = slot
+
+    def slots(self):
+        with self._lock:
+            return list(self._slots.values())
+
+    def evict_idle(self, idle_seconds):
+        now = time.time()
+        for slot in self.slots():
+            # Never wait on a session that is running; it will be checked again next sweep
+            if not slot.lock.acquire(blocking=False):
+                continue
+            try:
+                if not slot.checked_out and slot.json_data is not None and now - slot.last_active > idle_seconds:
+                    slot.compact_now()
+            except Exception as e:
+                print(f"Failed to evict idle session {slot.session_id}: {e}", file=sys.stderr)
+            finally:
+                slot.lock.release()
+
+def _sweep_forever(registry):
+    while True:
+        time.sleep(SWEEP_INTERVAL_SECONDS)
+        registry.evict_idle(IDLE_EVICT_SECONDS)
+
+@st.cache_resource
+def get_session_registry():
+    registry = SessionRegistry()
+    if IDLE_EVICT_SECONDS > 0:
+        threading.Thread(target=_sweep_forever, args=(registry,), daemon=True, name="roadcraft-idle-eviction").start()
+    return registry
+
+# --- Script Run Hooks ---
+def checkout_session():
+    """Call at the start of a run: puts this session's save back into st.session_state.json_data."""
+    if 'session_slot' not in st.session_state:
+        st.session_state.session_slot = SessionSlot()
+        get_session_registry().register(st.session_state.session_slot)
+    slot = st.session_state.session_slot
+
+    with slot.lock:
+        slot.checked_out = True
+        slot.last_active = time.time()
+        if st.session_state.get('json_data') is not None:
+            # The previous run stopped early (st.rerun after loading/editing) and never checked in
+            slot.store(st.session_state.json_data, st.session_state.get('original_file_content_bytes'), st.session_state.get('edit_history'))
+        elif slot.has_save():
+            st.session_state.json_data = slot.take()
+
+def checkin_session():
+    """Call at the end of a run: moves the save out of st.session_state and into the slot, compacting it in low-memory mode."""
+    slot = st.session_state.session_slot
+    with slot.lock:
+        slot.store(st.session_state.get('json_data'), st.session_state.get('original_file_content_bytes'), st.session_state.get('edit_history'))
+        st.session_state.json_data = None
+        if LOW_MEMORY_MODE:
+            slot.compact_now()
+        slot.update_stats(st.session_state)
+        # The raw JSON text area holds the whole pretty-printed save. Drop it between runs in every
+        # mode: the browser sends the widget's value again with the next interaction, so edits are
+        # kept, and otherwise it is rebuilt from json_data. This also covers sessions evicted later.
+        st.session_state.pop(RAW_TEXT_AREA_KEY, None)
+        slot.checked_out = False
+        slot.last_active = time.time()
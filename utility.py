@@ -1,4 +1,5 @@
 import hashlib
+import json
 import zlib
 import streamlit as st
 
@@ -34,9 +35,15 @@ def try_decompress_zlib_block(data, start_offset=0):
     result['decompressed_bytes'] = decompressed
     return result
 
-def decode_file(file_content_bytes):
-    """Decode a file by decompressing its zlib blocks and return a single byte array."""
+def decode_file(file_content_bytes, raise_errors=False):
+    """Decode a file by decompressing its zlib blocks and return a single byte array.
+
+    Errors are shown with st.error and (None, None) is returned, unless raise_errors
+    is set (e.g. from the command line), in which case they are raised to the caller.
+    """
     if not file_content_bytes:
+        if raise_errors:
+            raise ValueError("File is empty.")
         return None, None
 
     # st.write(f"File size: {len(file_content_bytes)} bytes") # Commented out to avoid cluttering UI
@@ -53,53 +60,91 @@ def decode_file(file_content_bytes):
             decompressed_data.extend(result['decompressed_bytes'])
             offset += result['compressed_size'] + 8 # 8 bytes for the 2 int32s
     except zlib.error as e:
+        if raise_errors:
+            raise
         st.error(f"Zlib decompression error: {e}. The file might be corrupted or not a valid save file.")
         return None, None
     except Exception as e:
+        if raise_errors:
+            raise
         st.error(f"Error during file decoding: {e}")
         return None, None
     
     # st.write(f"Total decompressed data size: {len(decompressed_data)} bytes")
     return file_content_bytes, decompressed_data
 
+def index_blocks(file_content_bytes):
+    """Read only the block headers and return (offset, compressed_size, uncompressed_size) for each zlib block."""
+    block_index = []
+    offset = HEADER_LENGTH
+    while offset < len(file_content_bytes):
+        uncompressed_size = int.from_bytes(file_content_bytes[offset:offset + 4], byteorder='little')
+        compressed_size = int.from_bytes(file_content_bytes[offset + 4:offset + 8], byteorder='little')
+        block_index.append((offset, compressed_size, uncompressed_size))
+        offset += compressed_size + 8 # 8 bytes for the 2 int32s
+    return tuple(block_index)
+
+def decompress_indexed(file_content_bytes, block_index):
+    """Decompress a file using a block index from index_blocks, without rescanning or copying the file per block."""
+    data = memoryview(file_content_bytes)
+    decompressed_data = bytearray()
+    for offset, compressed_size, _uncompressed_size in block_index:
+        # Skip the two int32s and the 2-byte zlib header; the stream ends before the 4-byte adler32
+        decompressed_data.extend(zlib.decompress(data[offset + 10:offset + 8 + compressed_size - 4], wbits=WBITS_VALUE))
+    return decompressed_data
+
+def dump_save_json(json_data):
+    """Serialize a parsed save back to the bytes the game expects."""
+    return json.dumps(
+        json_data,
+        indent=3, # Pretty print for readability
+        ensure_ascii=False, # Allow non-ASCII characters
+        separators=(',', ': ') # Compact separators for smaller output
+    ).encode('utf-8')
+
+def build_encoded_file(original_file_content, decompressed_data_edited):
+    """Compress the edited data into chunks and rebuild the save header. Returns (file bytes, new MD5)."""
+    new_zlib_data = b''
+    chunk_size = 1024**2 # 1 MB (1MB chunks for compression)
+    offset = 0
+
+    while offset < len(decompressed_data_edited):
+        chunk = decompressed_data_edited[offset:offset + chunk_size]
+        offset += chunk_size
+
+        new_block_uncompressed_size_bytes = len(chunk).to_bytes(4, 'little')
+        
+        # Using WBITS_VALUE=-15 for raw deflate stream, as per original code's design
+        new_compressed_data = zlib.compress(chunk, level=-1, wbits=WBITS_VALUE) 
+        
+        adler32 = zlib.adler32(chunk)
+        adler32_bytes = adler32.to_bytes(4, 'big')
+
+        new_block_compressed_size = len(new_compressed_data) + 6
+        new_block_compressed_size_bytes = new_block_compressed_size.to_bytes(4, 'little')
+
+        # Append the new block to the new data
+        new_zlib_data += new_block_uncompressed_size_bytes + new_block_compressed_size_bytes + ZLIB_HEADER + new_compressed_data + adler32_bytes
+
+    # Rebuild header components
+    original_filetype = original_file_content[:4]
+    zero_bytes = b'\x00\x00\x00\x00'
+    three_byte = b'\x03' # Constant byte from original header logic
+    new_total_compressed_size_bytes = len(new_zlib_data).to_bytes(4, 'little')
+    new_total_uncompressed_size_bytes = len(decompressed_data_edited).to_bytes(4, 'little')
+    new_md5 = compute_md5(new_zlib_data)
+    new_md5_bytes = new_md5.encode('utf-8')
+
+    final_data = original_filetype + new_total_compressed_size_bytes + zero_bytes + new_total_uncompressed_size_bytes + zero_bytes + new_md5_bytes + three_byte + new_zlib_data
+    return final_data, new_md5
+
 def encode_file(original_file_content, decompressed_data_edited):
     """Encode a file by compressing the decompressed data into chunks."""
     try:
         st.info("Rebuilding the file with the new compressed data...")
 
-        new_zlib_data = b''
-        chunk_size = 1024**2 # 1 MB (1MB chunks for compression)
-        offset = 0
-
-        while offset < len(decompressed_data_edited):
-            chunk = decompressed_data_edited[offset:offset + chunk_size]
-            offset += chunk_size
-
-            new_block_uncompressed_size_bytes = len(chunk).to_bytes(4, 'little')
-            
-            # Using WBITS_VALUE=-15 for raw deflate stream, as per original code's design
-            new_compressed_data = zlib.compress(chunk, level=-1, wbits=WBITS_VALUE) 
-            
-            adler32 = zlib.adler32(chunk)
-            adler32_bytes = adler32.to_bytes(4, 'big')
-
-            new_block_compressed_size = len(new_compressed_data) + 6
-            new_block_compressed_size_bytes = new_block_compressed_size.to_bytes(4, 'little')
-
-            # Append the new block to the new data
-            new_zlib_data += new_block_uncompressed_size_bytes + new_block_compressed_size_bytes + ZLIB_HEADER + new_compressed_data + adler32_bytes
-
-        # Rebuild header components
-        original_filetype = original_file_content[:4]
-        zero_bytes = b'\x00\x00\x00\x00'
-        three_byte = b'\x03' # Constant byte from original header logic
-        new_total_compressed_size_bytes = len(new_zlib_data).to_bytes(4, 'little')
-        new_total_uncompressed_size_bytes = len(decompressed_data_edited).to_bytes(4, 'little')
-        new_md5 = compute_md5(new_zlib_data)
+        final_data, new_md5 = build_encoded_file(original_file_content, decompressed_data_edited)
         st.info(f"New MD5 hash of compressed data: {new_md5}")
-        new_md5_bytes = new_md5.encode('utf-8')
-
-        final_data = original_filetype + new_total_compressed_size_bytes + zero_bytes + new_total_uncompressed_size_bytes + zero_bytes + new_md5_bytes + three_byte + new_zlib_data
 
         # In Streamlit, we offer the file for download directly
         st.download_button(